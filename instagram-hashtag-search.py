@@ -18,17 +18,139 @@ Requirements:
 
 import asyncio
 import argparse
+import itertools
 import json
+import os
+import random
 import re
+import shelve
 import sys
-from datetime import datetime
+import time
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError
+from typing import Dict, Iterable, Iterator, List, Optional, Sized, Tuple
+from urllib.parse import urljoin
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, TimeoutError
+
+try:
+    import httpx  # Optional: enables the no-browser fast path
+except ImportError:
+    httpx = None
+
+VIEWPORT = {"width": 1280, "height": 800}
+
+# Start of an ISO-8601 datetime, as found in <time datetime="...">
+ISO_DATETIME_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}T')
+
+# Minimum random delay range (seconds) before each search, to spread out parallel workers
+MIN_JITTER = 1.0
+
+# Max size of one JSON line exchanged with a --serve process
+SOCKET_LIMIT = 16 * 1024 * 1024
+
+# Instagram's web API answers with JSON when called with the web app's id
+IG_APP_ID = "936619743392459"
+TAG_INFO_URL = "https://www.instagram.com/api/v1/tags/web_info/"
+# Older JSON variant of the hashtag page (GraphQL-shaped, with edge_hashtag_to_media)
+TAG_PAGE_JSON_URL = "https://www.instagram.com/explore/tags/{hashtag}/"
+
+# Instagram shows posts in various ways - one union covers posts in an article or in main
+POST_LINK_SELECTOR = 'article a[href*="/p/"], main a[href*="/p/"]'
+NO_POSTS_SELECTOR = ':text("No posts yet")'
+
+# Only rendered for a logged-in user (profile settings link, home nav icon)
+LOGGED_IN_SELECTOR = 'a[href="/accounts/edit/"], svg[aria-label="Home"]'
+
+# Resources the searches never look at; skipping them saves most of the bandwidth
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Text that looks like a post date when no <time> element is found
+# ("March 3", relative ages like "2d", or ISO dates), as one alternation
+DATE_PATTERN = re.compile(
+    r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}'
+    r'|\d{1,2}[wdhm]'
+    r'|\d{4}-\d{2}-\d{2}'
+)
+
+
+def parse_iso_datetime(value: str) -> Optional[datetime]:
+    """Parse an ISO-8601 datetime such as '2025-11-10T15:30:00.000Z'; None if it isn't one."""
+    if not ISO_DATETIME_PATTERN.match(value):
+        return None
+    try:
+        if sys.version_info >= (3, 11):
+            # Accepts the trailing 'Z' natively
+            return datetime.fromisoformat(value)
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def make_hashtag(hashtag_base: str, username: str) -> str:
+    """Build the per-user hashtag, e.g. ('rebelscapes', 'leo19.62') -> 'rebelscapes_leo1962'."""
+    # Remove periods from username for hashtag (e.g., leo19.62 -> leo1962)
+    return f"{hashtag_base}_{username.replace('.', '')}"
+
+
+def _iter_posts(data) -> Iterator[Tuple[str, int, str]]:
+    """
+    Yield (id, timestamp, caption) for every post nested anywhere in an API response.
+
+    Understands both the web API's media objects ('taken_at', 'caption.text') and the
+    GraphQL nodes served with ?__a=1 ('taken_at_timestamp', 'edge_media_to_caption').
+    """
+    if isinstance(data, dict):
+        if "taken_at" in data:
+            caption = (data.get("caption") or {}).get("text") or ""
+            yield str(data.get("pk") or data.get("id") or data.get("code")), data["taken_at"], caption
+        elif "taken_at_timestamp" in data:
+            edges = (data.get("edge_media_to_caption") or {}).get("edges") or []
+            caption = " ".join((edge.get("node") or {}).get("text") or "" for edge in edges)
+            yield str(data.get("id") or data.get("shortcode")), data["taken_at_timestamp"], caption
+        else:
+            for value in data.values():
+                yield from _iter_posts(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _iter_posts(value)
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` acquisitions per `period` seconds, shared by all workers."""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
 
 
 class InstagramHashtagSearcher:
-    def __init__(self, browser_type: str = "chromium", headless: bool = False, user_data_dir: Optional[str] = None):
+    def __init__(
+        self,
+        browser_type: str = "chromium",
+        headless: bool = False,
+        user_data_dir: Optional[str] = None,
+        block_media: bool = True,
+        auth_file: Optional[str] = None,
+        fast_path: bool = True,
+        cache_file: Optional[str] = None,
+        cache_ttl: float = 0,
+        progress_file: Optional[str] = None
+    ):
         """
         Initialize the Instagram Hashtag Searcher.
 
@@ -36,51 +158,89 @@ class InstagramHashtagSearcher:
             browser_type: Browser to use ('chromium', 'webkit' for Safari, or 'firefox')
             headless: Whether to run browser in headless mode
             user_data_dir: Directory to store browser data (cookies, login, etc.) for persistence
+            block_media: Whether to skip loading images, video and fonts
+            auth_file: JSON file to save/load the login (storage state) when not using user_data_dir
+            fast_path: Try Instagram's JSON API over plain HTTP before the browser (needs httpx)
+            cache_file: File to keep successful results in between runs
+            cache_ttl: Seconds a cached result stays valid (0 disables the cache)
+            progress_file: File each result is appended to (one JSON object per line) as soon as
+                it's found, so a crash or interrupt doesn't lose finished searches. Lines from
+                earlier runs are kept, never truncated
         """
         self.browser_type = browser_type
         self.headless = headless
         self.user_data_dir = user_data_dir
+        self.block_media = block_media
+        self.auth_file = auth_file
+        self.fast_path = fast_path and httpx is not None
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.progress_file = progress_file
         self.results: Dict[str, Dict] = {}
-
-    async def _post_modal_contains_hashtag(self, page: Page, hashtag_slug: str) -> bool:
+        # Set while run() is active; workers open their pages from these
+        self._browser: Optional[Browser] = None
+        self._context: Optional[BrowserContext] = None
+        self._storage_state: Optional[Dict] = None
+        self._http = None
+        self._limiter: Optional[RateLimiter] = None
+        self._cache: Optional[shelve.Shelf] = None
+        self._playwright = None
+        self._progress = None
+
+    async def _inspect_post(self, page: Page, hashtag_slug: str) -> Tuple[bool, Optional[str]]:
         """
-        True if the open post's caption/body includes the target hashtag.
-        Prefer tag links (Instagram uses /explore/tags/{slug}/); fall back to raw text.
+        Check the open post in a single round trip to the browser.
+
+        Returns whether the post's caption/body includes the target hashtag, and
+        the post's date (None if not found). For the hashtag, prefer tag links
+        (Instagram uses /explore/tags/{slug}/) and fall back to the article text.
+        For the date, prefer <time> elements (datetime attribute, then text) and
+        fall back to article text that looks like a date.
         """
         try:
-            has_tag_link = await page.evaluate(
-                """(slug) => {
-                    const slugLower = String(slug).toLowerCase();
-                    const anchors = document.querySelectorAll('a[href*="/explore/tags/"]');
-                    for (const a of anchors) {
-                        try {
-                            const u = new URL(a.getAttribute('href') || '', window.location.origin);
-                            const parts = u.pathname.split('/').filter(Boolean);
-                            const ti = parts.indexOf('tags');
-                            if (ti >= 0 && ti + 1 < parts.length) {
-                                if (parts[ti + 1].toLowerCase() === slugLower) return true;
-                            }
-                        } catch (e) { /* ignore */ }
-                    }
-                    return false;
+            found = await page.evaluate(
+                """({slug, pattern}) => {
+                    const hasTag = () => {
+                        const slugLower = String(slug).toLowerCase();
+                        const anchors = document.querySelectorAll('a[href*="/explore/tags/"]');
+                        for (const a of anchors) {
+                            try {
+                                const u = new URL(a.getAttribute('href') || '', window.location.origin);
+                                const parts = u.pathname.split('/').filter(Boolean);
+                                const ti = parts.indexOf('tags');
+                                if (ti >= 0 && ti + 1 < parts.length) {
+                                    if (parts[ti + 1].toLowerCase() === slugLower) return true;
+                                }
+                            } catch (e) { /* ignore */ }
+                        }
+                        const article = document.querySelector('article');
+                        const text = article ? (article.innerText || '') : '';
+                        return text.toLowerCase().includes('#' + slugLower);
+                    };
+
+                    const postDate = () => {
+                        const withDatetime = document.querySelector('time[datetime]:not([datetime=""])');
+                        if (withDatetime) return withDatetime.getAttribute('datetime');
+                        for (const el of document.querySelectorAll('time')) {
+                            const text = (el.textContent || '').trim();
+                            if (text) return text;
+                        }
+                        const rx = new RegExp(pattern);
+                        for (const el of document.querySelectorAll('article a, article span')) {
+                            const text = (el.textContent || '').trim();
+                            if (text && rx.test(text)) return text;
+                        }
+                        return null;
+                    };
+
+                    if (!hasTag()) return {hasTag: false, date: null};
+                    return {hasTag: true, date: postDate()};
                 }""",
-                hashtag_slug,
+                {"slug": hashtag_slug, "pattern": DATE_PATTERN.pattern},
             )
-            if has_tag_link:
-                return True
         except Exception:
-            pass
-
-        try:
-            article = await page.query_selector("article")
-            if article:
-                text = await article.inner_text()
-                if text and f"#{hashtag_slug}".lower() in text.lower():
-                    return True
-        except Exception:
-            pass
-
-        return False
+            return False, None
+        return found["hasTag"], found["date"]
 
     async def search_hashtag_for_user(
         self,
@@ -104,24 +264,35 @@ class InstagramHashtagSearcher:
         Returns:
             Dictionary with results or None if not found
         """
-        # Remove periods from username for hashtag (e.g., leo19.62 -> leo1962)
-        username_clean = username.replace('.', '')
-        hashtag = f"{hashtag_base}_{username_clean}"
+        hashtag = make_hashtag(hashtag_base, username)
         search_url = f"https://www.instagram.com/explore/tags/{hashtag}/"
 
         print(f"\n🔍 Searching for #{hashtag}...")
 
         try:
             # Navigate to the hashtag page
-            await page.goto(search_url, wait_until="networkidle", timeout=30000)
+            await page.goto(search_url, wait_until="domcontentloaded", timeout=15000)
 
-            # Wait a bit for content to load
-            await page.wait_for_timeout(3000)
+            # Wait until either the post grid or the "No posts yet" notice is rendered
+            first_match = None
+            try:
+                first_match = await page.wait_for_selector(
+                    f"{POST_LINK_SELECTOR}, {NO_POSTS_SELECTOR}",
+                    state="attached",
+                    timeout=10000
+                )
+            except TimeoutError:
+                pass
+
+            # Tell from the first match which of them it was
+            matched = None
+            if first_match:
+                matched = await first_match.evaluate(
+                    """(el) => el.matches('a[href*="/p/"]') ? 'posts' : 'no_posts'"""
+                )
 
             # Check if hashtag exists (look for "No posts yet" or similar)
-            page_content = await page.content()
-
-            if "No posts yet" in page_content:
+            if matched == 'no_posts':
                 print(f"  ⚠️  No posts found for #{hashtag}")
                 return {
                     "username": username,
@@ -134,24 +305,19 @@ class InstagramHashtagSearcher:
             # Find posts in the grid; open as many as needed until we date-check
             # max_posts_to_check caption matches (skips do not count toward the limit).
             try:
-                # Instagram shows posts in various ways - try multiple selectors
-                post_link_selectors = [
-                    'article a[href*="/p/"]',  # Posts in article
-                    'main a[href*="/p/"]',     # Posts in main section
-                ]
-
-                all_post_links = []
-                for selector in post_link_selectors:
-                    try:
-                        links = await page.query_selector_all(selector)
-                        if links:
-                            all_post_links = links
-                            print(f"  📸 Found {len(links)} posts using selector: {selector}")
-                            break
-                    except Exception:
-                        continue
+                # Read the post URLs straight from the grid in one round trip; posts are
+                # then opened by URL rather than by clicking grid items. A link inside an
+                # article inside main matches both halves of the union, so dedupe.
+                hrefs = await page.eval_on_selector_all(
+                    POST_LINK_SELECTOR, "els => els.map((el) => el.getAttribute('href'))"
+                )
+                post_urls = list(dict.fromkeys(
+                    urljoin("https://www.instagram.com/", href) for href in hrefs if href
+                ))
+                if post_urls:
+                    print(f"  📸 Found {len(post_urls)} posts")
 
-                if not all_post_links:
+                if not post_urls:
                     print(f"  ⚠️  Could not find any posts for #{hashtag}")
                     return {
                         "username": username,
@@ -166,28 +332,33 @@ class InstagramHashtagSearcher:
                     f"that include #{hashtag} in the caption (other grid posts are skipped)..."
                 )
 
-                # Store all dates we find (only from posts whose caption includes the tag)
-                all_dates = []
+                # Keep a running maximum of the dates we find (only from posts whose caption
+                # includes the tag), plus the first raw one in case none of them parse
+                most_recent = None
+                first_date = None
+                dates_found = 0
                 skipped_no_hashtag = 0
                 matched_for_dates = 0
                 total_grid_opens = 0
 
-                for post_link in all_post_links:
+                for post_url in post_urls:
                     if matched_for_dates >= max_posts_to_check:
                         break
                     total_grid_opens += 1
                     try:
                         print(f"    [Grid #{total_grid_opens}] Opening post...")
 
-                        # Click on the post
-                        await post_link.click()
-                        await page.wait_for_timeout(2000)
+                        # Open the post page and wait for its content
+                        await page.goto(post_url, wait_until="domcontentloaded", timeout=15000)
+                        try:
+                            await page.wait_for_selector('time[datetime], article', state="attached", timeout=8000)
+                        except TimeoutError:
+                            pass
 
-                        if not await self._post_modal_contains_hashtag(page, hashtag):
+                        has_tag, post_date = await self._inspect_post(page, hashtag)
+                        if not has_tag:
                             skipped_no_hashtag += 1
                             print(f"      ⏭️  Skipping: caption does not include #{hashtag}")
-                            await page.keyboard.press('Escape')
-                            await page.wait_for_timeout(1000)
                             continue
 
                         matched_for_dates += 1
@@ -196,81 +367,22 @@ class InstagramHashtagSearcher:
                             f"({matched_for_dates}/{max_posts_to_check})"
                         )
 
-                        # Try to find the date/time information
-                        post_date = None
-
-                        # First try standard time selectors
-                        date_selectors = [
-                            'time[datetime]',
-                            'time',
-                            'article time',
-                            'a time',
-                        ]
-
-                        for selector in date_selectors:
-                            try:
-                                time_elements = await page.query_selector_all(selector)
-                                for time_element in time_elements:
-                                    datetime_attr = await time_element.get_attribute('datetime')
-                                    if datetime_attr:
-                                        post_date = datetime_attr
-                                        break
-
-                                    text = await time_element.text_content()
-                                    if text and text.strip():
-                                        post_date = text.strip()
-                                        break
-
-                                if post_date:
-                                    break
-                            except Exception:
-                                continue
-
-                        # If no time element, try text patterns
-                        if not post_date:
-                            try:
-                                all_text_elements = await page.query_selector_all('article a, article span')
-                                date_patterns = [
-                                    r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}',
-                                    r'\d{1,2}[wdhm]',
-                                    r'\d{4}-\d{2}-\d{2}',
-                                ]
-
-                                for element in all_text_elements:
-                                    text = await element.text_content()
-                                    if text:
-                                        text = text.strip()
-                                        for pattern in date_patterns:
-                                            if re.search(pattern, text):
-                                                post_date = text
-                                                break
-                                    if post_date:
-                                        break
-                            except Exception:
-                                pass
-
                         if post_date:
                             print(f"      📅 Found date: {post_date}")
-                            all_dates.append(post_date)
+                            dates_found += 1
+                            if first_date is None:
+                                first_date = post_date
+                            parsed = parse_iso_datetime(post_date)
+                            if parsed and (most_recent is None or parsed > most_recent):
+                                most_recent = parsed
                         else:
                             print(f"      ⚠️  No date found for this post")
 
-                        # Close the modal - press Escape or click close button
-                        await page.keyboard.press('Escape')
-                        await page.wait_for_timeout(1000)
-
                     except Exception as e:
                         print(f"      ❌ Error checking grid post #{total_grid_opens}: {e}")
-                        # Try to close modal and continue
-                        try:
-                            await page.keyboard.press('Escape')
-                            await page.wait_for_timeout(500)
-                        except:
-                            pass
                         continue
 
-                # Now find the most recent date
-                if not all_dates:
+                if not dates_found:
                     if (
                         matched_for_dates == 0
                         and skipped_no_hashtag == total_grid_opens
@@ -301,7 +413,7 @@ class InstagramHashtagSearcher:
                     return {
                         "username": username,
                         "hashtag": f"#{hashtag}",
-                        "post_count": len(all_post_links),
+                        "post_count": len(post_urls),
                         "grid_posts_opened": total_grid_opens,
                         "posts_checked": matched_for_dates,
                         "skipped_no_hashtag_in_caption": skipped_no_hashtag,
@@ -309,48 +421,33 @@ class InstagramHashtagSearcher:
                         "status": status
                     }
 
-                # Parse and find most recent
-                print(f"  📊 Found {len(all_dates)} dates, determining most recent...")
-                parsed_dates = []
-
-                for date_str in all_dates:
-                    try:
-                        if 'T' in str(date_str):  # ISO format
-                            parsed = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                            parsed_dates.append((parsed, date_str))
-                    except:
-                        # Keep the string for display even if we can't parse it
-                        pass
-
-                if parsed_dates:
-                    # Sort by datetime, get the most recent
-                    most_recent = max(parsed_dates, key=lambda x: x[0])
-                    formatted_date = most_recent[0].strftime('%Y-%m-%d %H:%M:%S')
+                print(f"  📊 Found {dates_found} dates")
+                if most_recent:
+                    formatted_date = most_recent.strftime('%Y-%m-%d %H:%M:%S')
 
                     print(f"  ✅ Most recent post: {formatted_date}")
                     return {
                         "username": username,
                         "hashtag": f"#{hashtag}",
-                        "post_count": len(all_post_links),
+                        "post_count": len(post_urls),
                         "grid_posts_opened": total_grid_opens,
                         "posts_checked": matched_for_dates,
                         "skipped_no_hashtag_in_caption": skipped_no_hashtag,
-                        "dates_found": len(all_dates),
+                        "dates_found": dates_found,
                         "most_recent_date": formatted_date,
                         "status": "success"
                     }
                 else:
                     # Return the first date string we found even if we can't parse it
-                    first_date = all_dates[0]
                     print(f"  ⚠️  Found dates but couldn't parse them: {first_date}")
                     return {
                         "username": username,
                         "hashtag": f"#{hashtag}",
-                        "post_count": len(all_post_links),
+                        "post_count": len(post_urls),
                         "grid_posts_opened": total_grid_opens,
                         "posts_checked": matched_for_dates,
                         "skipped_no_hashtag_in_caption": skipped_no_hashtag,
-                        "dates_found": len(all_dates),
+                        "dates_found": dates_found,
                         "most_recent_date": first_date,
                         "status": "success_unparsed"
                     }
@@ -384,141 +481,490 @@ class InstagramHashtagSearcher:
                 "status": f"error: {str(e)}"
             }
 
+    async def _is_logged_in(self, context: BrowserContext) -> bool:
+        """True if the context holds an Instagram session cookie."""
+        cookies = await context.cookies("https://www.instagram.com")
+        return any(cookie["name"] == "sessionid" for cookie in cookies)
+
+    async def _configure_context(self, context: BrowserContext) -> None:
+        """Abort requests for resources we never read (images, video, fonts)."""
+        if not self.block_media:
+            return
+
+        async def filter_route(route):
+            if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route("**/*", filter_route)
+
+    async def _open_worker_page(self) -> Tuple[Page, Optional[BrowserContext]]:
+        """
+        Open a page for one search worker.
+
+        Returns the page and the context created for it (None when the page is a
+        tab in the shared persistent context).
+        """
+        if self._browser:
+            context = await self._browser.new_context(
+                viewport=VIEWPORT,
+                storage_state=self._storage_state,
+                service_workers="block"
+            )
+            await self._configure_context(context)
+            return await context.new_page(), context
+
+        page = await self._context.new_page()
+        await page.set_viewport_size(VIEWPORT)
+        return page, None
+
+    async def _open_http_client(self, page: Page):
+        """
+        Create the pooled HTTP client for the fast path, logged in with the
+        browser's Instagram cookies. Returns None if it can't be created.
+        """
+        cookies = httpx.Cookies()
+        for cookie in await page.context.cookies("https://www.instagram.com"):
+            cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+
+        headers = {
+            "User-Agent": await page.evaluate("navigator.userAgent"),
+            "X-IG-App-ID": IG_APP_ID,
+        }
+        try:
+            return httpx.AsyncClient(
+                http2=True,
+                headers=headers,
+                cookies=cookies,
+                limits=httpx.Limits(max_connections=20),
+                timeout=15,
+            )
+        except ImportError:
+            # http2 needs the h2 package (pip install "httpx[http2]")
+            return httpx.AsyncClient(
+                headers=headers,
+                cookies=cookies,
+                limits=httpx.Limits(max_connections=20),
+                timeout=15,
+            )
+
+    async def search_hashtag_fast(
+        self,
+        hashtag_base: str,
+        username: str,
+        max_posts_to_check: int = 12
+    ) -> Optional[Dict]:
+        """
+        Look the hashtag up through Instagram's JSON API without a browser.
+
+        Uses the same caption rule as the browser search: only posts whose caption
+        includes the tag count. Returns a result only on success; None means
+        the caller should fall back to the browser search.
+        """
+        hashtag = make_hashtag(hashtag_base, username)
+        tag_lower = f"#{hashtag}".lower()
+        endpoints = [
+            (TAG_INFO_URL, {"tag_name": hashtag}),
+            (TAG_PAGE_JSON_URL.format(hashtag=hashtag), {"__a": "1", "__d": "dis"}),
+        ]
+
+        # Try each endpoint until one returns posts with the tag in the caption;
+        # redirects (to the login page) and blocks just move on to the next one
+        for url, params in endpoints:
+            try:
+                response = await self._http.get(url, params=params)
+                if not response.headers.get("content-type", "").startswith("application/json"):
+                    continue
+                data = response.json()
+            except Exception:
+                continue
+
+            posts = {post_id: (timestamp, caption) for post_id, timestamp, caption in _iter_posts(data)}
+            taken_at = []
+            for timestamp, caption in posts.values():
+                if tag_lower in caption.lower():
+                    taken_at.append(timestamp)
+                    if len(taken_at) >= max_posts_to_check:
+                        break
+            if taken_at:
+                break
+        else:
+            return None
+
+        most_recent = datetime.fromtimestamp(max(taken_at), tz=timezone.utc)
+        formatted_date = most_recent.strftime('%Y-%m-%d %H:%M:%S')
+        print(f"  ⚡ #{hashtag}: most recent post {formatted_date} (via API)")
+        return {
+            "username": username,
+            "hashtag": f"#{hashtag}",
+            "post_count": len(posts),
+            "posts_checked": len(taken_at),
+            "dates_found": len(taken_at),
+            "most_recent_date": formatted_date,
+            "status": "success"
+        }
+
+    async def _search_user(
+        self,
+        hashtag_base: str,
+        username: str,
+        progress: str,
+        wait_between_searches: int,
+        max_posts_to_check: int
+    ) -> None:
+        """Run one user's search: from the cache, the JSON API, or a page of its own."""
+        cache_key = f"{hashtag_base}_{username}"
+        cached = self._get_cached(cache_key)
+        if cached:
+            print(f"\n[{progress}] {username}: using result cached at {cached['cached_at']}")
+            self._record_result(username, {k: v for k, v in cached.items() if k != "cached_at"})
+            return
+
+        # Wait with jitter so concurrent workers don't hit Instagram at the same instant,
+        # and stay within the overall search rate
+        jitter = max(wait_between_searches / 2, MIN_JITTER)
+        await asyncio.sleep(wait_between_searches + random.uniform(0, jitter))
+        if self._limiter:
+            await self._limiter.acquire()
+
+        print(f"\n[{progress}] Processing user: {username}")
+        result = None
+        if self._http:
+            result = await self.search_hashtag_fast(hashtag_base, username, max_posts_to_check)
+
+        if not result:
+            page, context = await self._open_worker_page()
+            try:
+                result = await self.search_hashtag_for_user(page, hashtag_base, username, max_posts_to_check)
+            finally:
+                if context:
+                    await context.close()
+                else:
+                    await page.close()
+
+        if result:
+            self._record_result(username, result)
+            if self._cache is not None and result.get("status") == "success":
+                self._cache[cache_key] = {**result, "cached_at": datetime.now(timezone.utc).isoformat()}
+
+    def _record_result(self, username: str, result: Dict) -> None:
+        """Store a finished search and append it to the progress file."""
+        self.results[username] = result
+        if self._progress:
+            # One write per line; workers share the event loop, so lines never interleave
+            self._progress.write(json.dumps(result) + "\n")
+
+    def _get_cached(self, cache_key: str) -> Optional[Dict]:
+        """Return a successful result cached less than cache_ttl seconds ago, if any."""
+        if self._cache is None:
+            return None
+        entry = self._cache.get(cache_key)
+        if not entry:
+            return None
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(entry["cached_at"])
+        return entry if age.total_seconds() < self.cache_ttl else None
+
+    async def start(self, login_wait: int = 30, rate_limit: int = 20) -> None:
+        """
+        Launch the browser, make sure we're logged in and get ready to search.
+
+        Args:
+            login_wait: Seconds to wait for user to log in (0 to skip)
+            rate_limit: Max searches started per minute across all workers (0 for no limit)
+        """
+        self._playwright = await async_playwright().start()
+        p = self._playwright
+
+        # Launch browser with persistent context if user_data_dir is provided
+        if self.user_data_dir:
+            print(f"💾 Using persistent browser data from: {self.user_data_dir}")
+            if os.path.exists(self.user_data_dir):
+                print("   ✅ Found existing session data (already logged in!)")
+            else:
+                print("   📝 First time - will save login for future use")
+
+            # Launch with persistent context
+            if self.browser_type == "webkit":
+                context = await p.webkit.launch_persistent_context(
+                    self.user_data_dir,
+                    headless=self.headless,
+                    service_workers="block"
+                )
+            elif self.browser_type == "firefox":
+                context = await p.firefox.launch_persistent_context(
+                    self.user_data_dir,
+                    headless=self.headless,
+                    service_workers="block"
+                )
+            else:
+                context = await p.chromium.launch_persistent_context(
+                    self.user_data_dir,
+                    headless=self.headless,
+                    service_workers="block"
+                )
+
+            await self._configure_context(context)
+
+            # Get or create a page
+            if context.pages:
+                page = context.pages[0]
+            else:
+                page = await context.new_page()
+
+            browser = None  # No separate browser object when using persistent context
+        else:
+            # Launch browser normally (no persistence)
+            if self.browser_type == "webkit":
+                browser = await p.webkit.launch(headless=self.headless)
+            elif self.browser_type == "firefox":
+                browser = await p.firefox.launch(headless=self.headless)
+            else:
+                browser = await p.chromium.launch(headless=self.headless)
+
+            # Reuse the login saved by an earlier run, if any
+            storage_state = None
+            if self.auth_file and Path(self.auth_file).exists():
+                print(f"💾 Using saved login from: {self.auth_file}")
+                storage_state = self.auth_file
+
+            # Create a new page
+            context = await browser.new_context(storage_state=storage_state, service_workers="block")
+            await self._configure_context(context)
+            page = await context.new_page()
+
+        # Set a reasonable viewport size
+        await page.set_viewport_size(VIEWPORT)
+
+        # A saved session or auth file already carries the session cookie, so the
+        # home page only needs loading when we have to log in
+        logged_in = await self._is_logged_in(page.context)
+        if not logged_in:
+            if login_wait > 0:
+                print("\n📱 Loading Instagram...")
+                await page.goto("https://www.instagram.com/", wait_until="domcontentloaded", timeout=15000)
+
+                print("\n" + "=" * 60)
+                print("⚠️  NOT LOGGED INTO INSTAGRAM")
+                print("=" * 60)
+                print(f"   Please log in to Instagram in the browser window.")
+                print(f"   You have {login_wait} seconds to complete login.")
+                print(f"   (Use --login-wait to adjust this time)")
+                print("=" * 60)
+
+                # Wait for login with countdown, moving on as soon as it happens
+                for remaining in range(login_wait, 0, -5):
+                    print(f"   ⏳ {remaining} seconds remaining...")
+                    try:
+                        await page.wait_for_selector(
+                            LOGGED_IN_SELECTOR, state="attached", timeout=min(remaining, 5) * 1000
+                        )
+                        break
+                    except TimeoutError:
+                        continue
+
+                # Check again if logged in
+                logged_in = await self._is_logged_in(page.context)
+                if not logged_in:
+                    print("\n⚠️  Still not logged in. Results may be limited.")
+                    print("   Consider using --login-wait with more time next time.\n")
+                else:
+                    print("\n✅ Successfully logged in!\n")
+            else:
+                print("⚠️  Not logged into Instagram. Some features may be limited.")
+        else:
+            print("✅ Already logged into Instagram")
+
+        # Share the login with the workers: a fresh context per worker when we own
+        # the browser, extra tabs in the persistent context otherwise
+        self._browser = browser
+        self._context = page.context
+        if browser:
+            self._storage_state = await page.context.storage_state()
+            if logged_in and self.auth_file:
+                # Save the login so the next run can skip it. The file holds the session
+                # cookies in plain text, so only the owner may read it.
+                fd = os.open(self.auth_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                os.chmod(self.auth_file, 0o600)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._storage_state, f)
+
+        if self.fast_path:
+            self._http = await self._open_http_client(page)
+
+        self._limiter = RateLimiter(rate_limit) if rate_limit > 0 else None
+
+        if self.cache_file and self.cache_ttl > 0:
+            self._cache = shelve.open(self.cache_file)
+
+        if self.progress_file:
+            # Append, line buffered: every finished search is on disk right away and
+            # a rerun after a crash doesn't wipe what the previous run saved
+            self._progress = open(self.progress_file, 'a', buffering=1)
+
+    async def search(
+        self,
+        hashtag_base: str,
+        usernames: Iterable[str],
+        wait_between_searches: int = 0,
+        max_posts_to_check: int = 12,
+        concurrency: int = 4
+    ) -> Dict[str, Dict]:
+        """
+        Search the hashtag for each user. start() must have been called.
+
+        `usernames` is consumed lazily, so it can be a generator over a large file.
+
+        Returns:
+            Dictionary of this search's results keyed by username
+        """
+        total = len(usernames) if isinstance(usernames, Sized) else None
+        pending = enumerate(usernames, 1)
+        searched = []
+
+        async def worker():
+            # Workers share one iterator, each pulling the next user when it's free
+            for index, username in pending:
+                searched.append(username)
+                progress = f"{index}/{total}" if total else str(index)
+                try:
+                    await self._search_user(
+                        hashtag_base, username, progress, wait_between_searches, max_posts_to_check
+                    )
+                except Exception as e:
+                    # Record the failure and keep this worker going with the next user
+                    print(f"  ❌ Error searching for {username}: {str(e)}")
+                    self._record_result(username, {
+                        "username": username,
+                        "hashtag": f"#{make_hashtag(hashtag_base, username)}",
+                        "post_count": "error",
+                        "most_recent_date": None,
+                        "status": f"error: {str(e)}"
+                    })
+
+        # Search users concurrently, at most `concurrency` at a time
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+        return {username: self.results[username] for username in searched if username in self.results}
+
+    async def close(self) -> None:
+        """Close the cache, progress file, HTTP client and browser opened by start()."""
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+        if self._progress:
+            self._progress.close()
+            self._progress = None
+
+        if self._http:
+            await self._http.aclose()
+            self._http = None
+
+        # Close browser (if not using persistent context)
+        if self._browser:
+            await self._browser.close()
+        elif self._context:
+            # Close the persistent context
+            await self._context.close()
+        self._browser = None
+        self._context = None
+
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
     async def run(
         self,
         hashtag_base: str,
-        usernames: List[str],
-        wait_between_searches: int = 3,
+        usernames: Iterable[str],
+        wait_between_searches: int = 0,
         login_wait: int = 30,
-        max_posts_to_check: int = 12
+        max_posts_to_check: int = 12,
+        concurrency: int = 4,
+        rate_limit: int = 20
     ) -> Dict[str, Dict]:
         """
         Run the hashtag search for multiple users.
 
         Args:
             hashtag_base: Base hashtag without username (e.g., 'rebelscapes')
-            usernames: List of usernames to search
-            wait_between_searches: Seconds to wait between searches
+            usernames: Usernames to search (any iterable, consumed lazily)
+            wait_between_searches: Extra seconds to wait before each search (plus random jitter)
             login_wait: Seconds to wait for user to log in (0 to skip)
             max_posts_to_check: Max posts with the tag in caption to extract dates from per hashtag
+            concurrency: Number of users to search in parallel
+            rate_limit: Max searches started per minute across all workers (0 for no limit)
 
         Returns:
             Dictionary of results keyed by username
         """
         print(f"\n🚀 Starting Instagram Hashtag Search")
         print(f"   Base hashtag: {hashtag_base}")
-        print(f"   Users to search: {len(usernames)}")
+        if isinstance(usernames, Sized):
+            print(f"   Users to search: {len(usernames)}")
         print(f"   Browser: {self.browser_type}")
+        print(f"   Concurrency: {concurrency}")
         print(f"=" * 60)
 
-        async with async_playwright() as p:
-            # Launch browser with persistent context if user_data_dir is provided
-            if self.user_data_dir:
-                print(f"💾 Using persistent browser data from: {self.user_data_dir}")
-                import os
-                if os.path.exists(self.user_data_dir):
-                    print("   ✅ Found existing session data (already logged in!)")
-                else:
-                    print("   📝 First time - will save login for future use")
-
-                # Launch with persistent context
-                if self.browser_type == "webkit":
-                    context = await p.webkit.launch_persistent_context(
-                        self.user_data_dir,
-                        headless=self.headless
-                    )
-                elif self.browser_type == "firefox":
-                    context = await p.firefox.launch_persistent_context(
-                        self.user_data_dir,
-                        headless=self.headless
-                    )
-                else:
-                    context = await p.chromium.launch_persistent_context(
-                        self.user_data_dir,
-                        headless=self.headless
-                    )
+        await self.start(login_wait, rate_limit)
+        try:
+            await self.search(hashtag_base, usernames, wait_between_searches, max_posts_to_check, concurrency)
+        finally:
+            await self.close()
 
-                # Get or create a page
-                if context.pages:
-                    page = context.pages[0]
-                else:
-                    page = await context.new_page()
+        return self.results
 
-                browser = None  # No separate browser object when using persistent context
-            else:
-                # Launch browser normally (no persistence)
-                if self.browser_type == "webkit":
-                    browser = await p.webkit.launch(headless=self.headless)
-                elif self.browser_type == "firefox":
-                    browser = await p.firefox.launch(headless=self.headless)
-                else:
-                    browser = await p.chromium.launch(headless=self.headless)
-
-                # Create a new page
-                page = await browser.new_page()
-
-            # Set a reasonable viewport size
-            await page.set_viewport_size({"width": 1280, "height": 800})
-
-            # Optional: Load Instagram once to use any existing login session
-            print("\n📱 Loading Instagram...")
-            await page.goto("https://www.instagram.com/", wait_until="networkidle")
-            await page.wait_for_timeout(3000)
-
-            # Check if logged in
-            page_content = await page.content()
-            if "Log in" in page_content or "Sign up" in page_content:
-                if login_wait > 0:
-                    print("\n" + "=" * 60)
-                    print("⚠️  NOT LOGGED INTO INSTAGRAM")
-                    print("=" * 60)
-                    print(f"   Please log in to Instagram in the browser window.")
-                    print(f"   You have {login_wait} seconds to complete login.")
-                    print(f"   (Use --login-wait to adjust this time)")
-                    print("=" * 60)
-
-                    # Wait for login with countdown
-                    for remaining in range(login_wait, 0, -5):
-                        if remaining > 5:
-                            print(f"   ⏳ {remaining} seconds remaining...")
-                            await page.wait_for_timeout(5000)
-                        else:
-                            print(f"   ⏳ {remaining} seconds remaining...")
-                            await page.wait_for_timeout(remaining * 1000)
-                            break
-
-                    # Check again if logged in
-                    page_content = await page.content()
-                    if "Log in" in page_content or "Sign up" in page_content:
-                        print("\n⚠️  Still not logged in. Results may be limited.")
-                        print("   Consider using --login-wait with more time next time.\n")
-                    else:
-                        print("\n✅ Successfully logged in!\n")
-                else:
-                    print("⚠️  Not logged into Instagram. Some features may be limited.")
-            else:
-                print("✅ Already logged into Instagram")
+    async def serve(
+        self,
+        socket_path: str,
+        wait_between_searches: int = 0,
+        login_wait: int = 30,
+        max_posts_to_check: int = 12,
+        concurrency: int = 4,
+        rate_limit: int = 20
+    ) -> None:
+        """
+        Keep the browser running and answer searches sent over a Unix socket.
 
-            # Search for each user's hashtag
-            for i, username in enumerate(usernames, 1):
-                print(f"\n[{i}/{len(usernames)}] Processing user: {username}")
-                result = await self.search_hashtag_for_user(page, hashtag_base, username, max_posts_to_check)
-                if result:
-                    self.results[username] = result
+        Each request is one JSON line {"hashtag": ..., "users": [...]} (optionally
+        "max_posts"); the reply is one JSON line {"results": {...}} keyed by
+        username, or {"error": "..."}. Searches are handled one at a time.
+        """
+        print(f"\n🚀 Starting Instagram Hashtag Search server")
+        print(f"   Socket: {socket_path}")
+        print(f"   Browser: {self.browser_type}")
+        print(f"   Concurrency: {concurrency}")
+        print(f"=" * 60)
 
-                # Wait between searches to avoid rate limiting
-                if i < len(usernames):
-                    print(f"   ⏳ Waiting {wait_between_searches} seconds before next search...")
-                    await page.wait_for_timeout(wait_between_searches * 1000)
+        lock = asyncio.Lock()
 
-            # Close browser (if not using persistent context)
-            if browser:
-                await browser.close()
-            elif self.user_data_dir:
-                # Close the persistent context
-                await page.context.close()
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request = json.loads(await reader.readline())
+                async with lock:
+                    results = await self.search(
+                        request["hashtag"],
+                        list(dict.fromkeys(request["users"])),
+                        wait_between_searches,
+                        request.get("max_posts", max_posts_to_check),
+                        concurrency
+                    )
+                response = {"results": results}
+            except Exception as e:
+                response = {"error": str(e)}
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+            writer.close()
 
-        return self.results
+        await self.start(login_wait, rate_limit)
+        try:
+            server = await asyncio.start_unix_server(handle, path=socket_path, limit=SOCKET_LIMIT)
+            print(f"\n🛰️  Listening on {socket_path} (Ctrl-C to stop)")
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+            Path(socket_path).unlink(missing_ok=True)
 
     def save_results(self, output_file: str):
         """Save results to a JSON file."""
@@ -538,13 +984,13 @@ class InstagramHashtagSearcher:
 
         for username, data in self.results.items():
             most_recent = data.get('most_recent_date')
-            if most_recent and most_recent != 'N/A' and most_recent is not None:
+            if most_recent and most_recent != 'N/A':
                 # Extract just the date part (YYYY-MM-DD)
-                date_only = most_recent.split()[0] if ' ' in most_recent else most_recent
+                date_only = most_recent.split(' ', 1)[0]
                 try:
-                    # Parse date for sorting
-                    parsed_date = datetime.strptime(date_only, '%Y-%m-%d')
-                    users_with_dates.append((username, date_only, parsed_date))
+                    # Validate the date; YYYY-MM-DD strings then sort in date order as-is
+                    date.fromisoformat(date_only)
+                    users_with_dates.append((date_only, username))
                 except ValueError:
                     # If parsing fails, treat as no date
                     users_without_dates.append(username)
@@ -553,27 +999,67 @@ class InstagramHashtagSearcher:
                 users_without_dates.append(username)
 
         # Sort users with dates by date (oldest first - least recent)
-        users_with_dates.sort(key=lambda x: x[2])
+        users_with_dates.sort()
 
         # Sort users without dates alphabetically for consistency
         users_without_dates.sort()
 
-        # Print in the requested format
-        print()
-        # First print users without dates (not featured yet - highest priority)
-        for username in users_without_dates:
-            print(f"{username} - most_recent: N/A")
-
-        # Then print users with dates (sorted by oldest first)
-        for username, date_only, _ in users_with_dates:
-            print(f"{username} - most_recent: {date_only}")
-
-
-def load_usernames_from_file(file_path: str) -> List[str]:
-    """Load usernames from a text file (one per line)."""
-    with open(file_path, 'r') as f:
-        usernames = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-    return usernames
+        # Print in the requested format: users without dates first (not featured
+        # yet - highest priority), then users with dates, oldest first
+        lines = [""]
+        lines.extend(f"{username} - most_recent: N/A" for username in users_without_dates)
+        lines.extend(f"{username} - most_recent: {date_only}" for date_only, username in users_with_dates)
+        print("\n".join(lines))
+
+
+def iter_usernames_from_file(file_path: str) -> Iterator[str]:
+    """
+    Yield usernames from a text file (one per line), skipping blanks and # comments.
+
+    The file is opened right away, so a bad path raises here rather than on the
+    first name; the lines themselves are read as they are consumed.
+    """
+    f = open(file_path, 'r')
+
+    def read_usernames() -> Iterator[str]:
+        with f:
+            for line in f:
+                username = line.strip()
+                if username and not line.startswith('#'):
+                    yield username
+
+    return read_usernames()
+
+
+def unique(items: Iterable[str]) -> Iterator[str]:
+    """Yield items in order, skipping ones already seen."""
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
+async def query_server(
+    socket_path: str,
+    hashtag_base: str,
+    usernames: List[str],
+    max_posts_to_check: Optional[int] = None
+) -> Dict[str, Dict]:
+    """Send a search to a running --serve process and return its results keyed by username."""
+    reader, writer = await asyncio.open_unix_connection(socket_path, limit=SOCKET_LIMIT)
+    request = {"hashtag": hashtag_base, "users": usernames}
+    if max_posts_to_check is not None:
+        request["max_posts"] = max_posts_to_check
+    writer.write((json.dumps(request) + "\n").encode())
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+
+    if "error" in response:
+        raise RuntimeError(f"Server error: {response['error']}")
+    return response["results"]
 
 
 async def main():
@@ -597,6 +1083,10 @@ Examples:
   # Give yourself 60 seconds to log in
   %(prog)s --hashtag rebelscapes --users alice --login-wait 60
 
+  # Keep a browser running in the background and send it searches
+  %(prog)s --serve /tmp/instagram-search.sock --save-session
+  %(prog)s --hashtag rebelscapes --users alice --connect /tmp/instagram-search.sock
+
   # Run in headless mode (no visible browser)
   %(prog)s --hashtag rebelscapes --users alice --headless
         """
@@ -604,7 +1094,6 @@ Examples:
 
     parser.add_argument(
         '--hashtag', '-t',
-        required=True,
         help='Base hashtag to search (without # or username), e.g., "rebelscapes"'
     )
 
@@ -632,6 +1121,18 @@ Examples:
         help='Run browser in headless mode (no visible window)'
     )
 
+    parser.add_argument(
+        '--load-media',
+        action='store_true',
+        help='Load images, video and fonts (blocked by default to speed up searches)'
+    )
+
+    parser.add_argument(
+        '--no-fast-path',
+        action='store_true',
+        help="Always use the browser, even when Instagram's JSON API could answer (requires httpx)"
+    )
+
     parser.add_argument(
         '--save-session',
         action='store_true',
@@ -644,17 +1145,65 @@ Examples:
         help='Directory to save browser session data [default: .instagram-session]'
     )
 
+    parser.add_argument(
+        '--auth-file',
+        metavar='FILE',
+        help='Save the login cookies to FILE (readable only by you) and reuse them on the '
+             'next run; an alternative to --save-session (e.g. .instagram-auth.json)'
+    )
+
+    parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='Keep the browser running and serve searches on this Unix socket'
+    )
+
+    parser.add_argument(
+        '--connect',
+        metavar='SOCKET',
+        help='Send the search to a --serve process listening on this Unix socket'
+    )
+
     parser.add_argument(
         '--output', '-o',
         default='instagram_results.json',
         help='Output file for results [default: instagram_results.json]'
     )
 
+    parser.add_argument(
+        '--cache-hours',
+        type=float,
+        default=0,
+        help='Reuse successful results from earlier runs that are less than this many hours old '
+             '(0 to always search) [default: 0]'
+    )
+
+    parser.add_argument(
+        '--cache-file',
+        default='.instagram-cache',
+        help='File for results reused by --cache-hours [default: .instagram-cache]'
+    )
+
     parser.add_argument(
         '--wait',
         type=int,
-        default=3,
-        help='Seconds to wait between searches [default: 3]'
+        default=0,
+        help='Extra seconds to wait before each search, on top of --rate-limit and a random '
+             'jitter of up to 1s (or 50%% of the wait) [default: 0]'
+    )
+
+    parser.add_argument(
+        '--rate-limit',
+        type=int,
+        default=20,
+        help='Max searches per minute across all parallel workers (0 for no limit) [default: 20]'
+    )
+
+    parser.add_argument(
+        '--concurrency', '-c',
+        type=int,
+        default=4,
+        help='Number of users to search in parallel [default: 4]'
     )
 
     parser.add_argument(
@@ -673,19 +1222,32 @@ Examples:
 
     args = parser.parse_args()
 
-    # Get usernames from command line or file
-    usernames = []
-    if args.users:
-        usernames.extend(args.users)
-    if args.users_file:
-        usernames.extend(load_usernames_from_file(args.users_file))
+    if not args.serve and not args.hashtag:
+        parser.error("--hashtag is required unless running with --serve")
 
-    if not usernames:
+    # Get usernames from command line or file; the file is read as the search goes
+    if not (args.users or args.users_file) and not args.serve:
         print("❌ Error: No usernames provided. Use --users or --users-file")
         sys.exit(1)
 
+    sources = [args.users or []]
+    if args.users_file:
+        try:
+            sources.append(iter_usernames_from_file(args.users_file))
+        except OSError as e:
+            print(f"❌ Error: Could not read --users-file: {e}")
+            sys.exit(1)
+
     # Remove duplicates while preserving order
-    usernames = list(dict.fromkeys(usernames))
+    usernames = unique(itertools.chain.from_iterable(sources))
+
+    # Read the first name now, so an empty list fails before the browser is started
+    first_username = next(usernames, None)
+    if first_username is None and not args.serve:
+        print("❌ Error: No usernames provided. Use --users or --users-file")
+        sys.exit(1)
+    if first_username is not None:
+        usernames = itertools.chain([first_username], usernames)
 
     # Create searcher and run
     user_data_dir = args.session_dir if args.save_session else None
@@ -693,17 +1255,41 @@ Examples:
     searcher = InstagramHashtagSearcher(
         browser_type=args.browser,
         headless=args.headless,
-        user_data_dir=user_data_dir
+        user_data_dir=user_data_dir,
+        block_media=not args.load_media,
+        auth_file=args.auth_file or None,
+        fast_path=not args.no_fast_path,
+        cache_file=args.cache_file,
+        cache_ttl=args.cache_hours * 3600,
+        progress_file=None if args.serve else f"{args.output}.ndjson"
     )
 
     try:
-        await searcher.run(
-            hashtag_base=args.hashtag,
-            usernames=usernames,
-            wait_between_searches=args.wait,
-            login_wait=args.login_wait,
-            max_posts_to_check=args.max_posts
-        )
+        if args.serve:
+            await searcher.serve(
+                socket_path=args.serve,
+                wait_between_searches=args.wait,
+                login_wait=args.login_wait,
+                max_posts_to_check=args.max_posts,
+                concurrency=args.concurrency,
+                rate_limit=args.rate_limit
+            )
+            return
+
+        if args.connect:
+            usernames = list(usernames)
+            print(f"\n🛰️  Sending search for {len(usernames)} user(s) to {args.connect}...")
+            searcher.results = await query_server(args.connect, args.hashtag, usernames, args.max_posts)
+        else:
+            await searcher.run(
+                hashtag_base=args.hashtag,
+                usernames=usernames,
+                wait_between_searches=args.wait,
+                login_wait=args.login_wait,
+                max_posts_to_check=args.max_posts,
+                concurrency=args.concurrency,
+                rate_limit=args.rate_limit
+            )
 
         # Print summary
         searcher.print_summary()
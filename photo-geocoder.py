@@ -4,7 +4,9 @@
 #     as a suffix.
 # It is fairly slow because it uses the Nominatim API for reverse geocoding. The script also caches the results.
 #
-# Usage: python photo-geocoder.py <folder_path>
+# Usage: python photo-geocoder.py [--offline] [--apply] <folder_path>
+#
+# Without --apply it only prints the renames it would do.
 #
 # Note that it tries to be specific, using suburb, district, town, and city in that order.  In many cases
 # suburb or town information is available but not city, so this way this script can get more hits.
@@ -12,109 +14,287 @@
 # I developed this quickly with the help of ChatGPT and some personal debugging, direction, and enhancements.
 # I have not tested this script extensively, so please use it with caution and test it on a small dataset first.
 #
+import argparse
 import os
-import subprocess
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import re
+import struct
+import threading
 import sys
 import requests
 import geopy.exc
 from PIL import Image
-from PIL.ExifTags import TAGS
+from PIL.ExifTags import GPS, IFD, TAGS
 from time import sleep
-import json
+import numpy as np
 from geopy.geocoders import Nominatim
-
-# Geocoding cache
-geocode_cache = {}
-
-# Helper function to round lat, lon to N decimal places
-def round_coords(lat, lon, decimals=4):
-    factor = 10 ** decimals
-    return round(lat * factor) / factor, round(lon * factor) / factor
-
-# Caching mechanism with rounded coordinates
+from geopy.extra.rate_limiter import RateLimiter
+
+# Offline reverse geocoding (GeoNames KD-tree) is optional
+try:
+    import reverse_geocoder
+except ImportError:
+    reverse_geocoder = None
+
+# HTTP-level caching of the Nominatim responses is optional
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# Lets Pillow open HEIC files too, so both JPEG and HEIC EXIF are read in-process
+from pillow_heif import register_heif_opener
+register_heif_opener()
+
+# Image files we look at (compared lowercased)
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.heic'})
+
+# Renamed images are marked with this extended attribute (or a .geo sidecar file where the
+# platform or filesystem has no xattrs), holding the place name, so later runs skip them
+GEOCODED_XATTR = 'user.photo_geocoder.place'
+SIDECAR_SUFFIX = '.geo'
+
+# Upper bound on the HEIC meta box / Exif item we read directly; larger ones go through
+# pillow-heif instead
+HEIC_META_MAX_BYTES = 4 * 1024 * 1024
+
+# Points are keyed (and handed to the geocoding thread) in batches of this size
+KEY_BATCH_SIZE = 64
+
+# Geocoding cache, kept across runs
+GEOCODE_CACHE_PATH = os.path.expanduser('~/.photo_geocoder_cache.db')
+HTTP_CACHE_PATH = os.path.expanduser('~/.photo_geocoder_http_cache')
+HTTP_CACHE_EXPIRE_SECONDS = 30 * 24 * 3600
+
+# Helper function to round all (lat, lon) points to N decimal places at once. Each key is
+# the rounded coordinates scaled to integers and packed into one int64 (lat in the high
+# 32 bits, lon in the low 32), so it compares exactly and hashes as a plain int.
+def coord_keys(points, decimals=4):
+    scaled = np.round(np.asarray(points, dtype=np.float64).reshape(-1, 2) * 10 ** decimals)
+    scaled = scaled.astype(np.int64)
+    return ((scaled[:, 0] << 32) | (scaled[:, 1] & 0xFFFFFFFF)).tolist()
+
+# Caching mechanism with rounded coordinates, stored in SQLite so later runs reuse it
 class GeocodeCache:
-    def __init__(self, tolerance=0.025, decimals=4):
-        self.cache = {}
+    def __init__(self, tolerance=0.025, decimals=4, path=GEOCODE_CACHE_PATH):
+        # Lookups happen on the geocoding thread, closing on the main one
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS place_names (key INTEGER PRIMARY KEY, name TEXT)"
+        )
         self.tolerance = tolerance  # This can be used for controlling rounding precision
         self.decimals = decimals  # Precision of rounding (default 4 decimal places)
 
-    def get_cached_location(self, lat, lon):
-        # Round the coordinates to the specified decimal places
-        rounded_lat, rounded_lon = round_coords(lat, lon, self.decimals)
+    def __enter__(self):
+        return self
 
-        # Check if the rounded coordinates are already cached
-        return self.cache.get((rounded_lat, rounded_lon), None)
-
-    def cache_location(self, lat, lon, location):
-        # Round the coordinates to the specified decimal places
-        rounded_lat, rounded_lon = round_coords(lat, lon, self.decimals)
+    def __exit__(self, *exc):
+        self.close()
 
-        # Store the location in the cache using the rounded coordinates as the key
-        self.cache[(rounded_lat, rounded_lon)] = location
+    def close(self):
+        self.db.commit()
+        self.db.close()
 
+    def keys(self, points):
+        # Round the coordinates to the specified decimal places
+        return coord_keys(points, self.decimals)
 
-def get_lat_lon_from_exif(image_path):
-    """Extracts latitude and longitude from EXIF data using exiftool."""
-    try:
-        result = subprocess.run(
-            ['exiftool', '-n', '-GPSLatitude', '-GPSLongitude', image_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    def get_cached_location(self, key):
+        # Check if the rounded coordinates are already cached
+        row = self.db.execute(
+            "SELECT name FROM place_names WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def cache_location(self, key, location):
+        # Store the location in the cache using the rounded coordinates as the key. Each entry
+        # cost a Nominatim request, so commit right away rather than lose it on a crash.
+        self.db.execute(
+            "INSERT OR REPLACE INTO place_names (key, name) VALUES (?, ?)",
+            (key, location)
         )
-
-        # Parse the output directly into latitude and longitude (decimal degrees)
-        lines = result.stdout.splitlines()
-        lat = None
-        lon = None
-
-        for line in lines:
-            if 'GPS Latitude' in line:  # Handle the space between 'GPS' and 'Latitude'
-                lat = float(line.split(":")[1].strip())
-            elif 'GPS Longitude' in line:  # Handle the space between 'GPS' and 'Longitude'
-                lon = float(line.split(":")[1].strip())
-
-        if lat is not None and lon is not None:
-            return lat, lon
-        else:
-            print(f"No GPS data found in {image_path}")
+        self.db.commit()
+
+
+def _iter_boxes(data, start=0, end=None):
+    """Yields (type, payload start, payload end) for the ISOBMFF boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    while start + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, start)
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, start + 8)
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header or start + size > end:
+            return
+        yield box_type, start + header, start + size
+        start += size
+
+
+def _read_uint(data, pos, size):
+    """Reads a big-endian unsigned int of 0, 4 or 8 bytes; returns (value, new pos)."""
+    if size == 0:
+        return 0, pos
+    return int.from_bytes(data[pos:pos + size], 'big'), pos + size
+
+
+def read_heic_exif_bytes(f):
+    """Reads the raw EXIF (TIFF) block of a HEIC file, touching only the meta box and the Exif item.
+
+    pillow-heif reads the whole file into memory before parsing it; this reads a few KB.
+    Returns None if the layout isn't one we understand, so callers can fall back to Pillow.
+    """
+    # Find the top-level meta box (it normally follows ftyp at the start of the file)
+    pos = 0
+    while True:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
             return None
-    except Exception as e:
-        print(f"Error extracting EXIF from {image_path}: {e}")
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', header, 8)
+            header_size = 16
+        if box_type == b'meta':
+            if size < 16 or size > HEIC_META_MAX_BYTES:
+                return None
+            meta = header[header_size:] + f.read(size - 16)
+            break
+        if size < header_size:
+            return None
+        pos += size
+
+    # meta is a full box: skip version/flags, then look for the Exif item and its location
+    exif_ids = set()
+    locations = {}
+    for box_type, start, end in _iter_boxes(meta, 4):
+        if box_type == b'iinf':
+            version = meta[start]
+            start += 4 + (2 if version == 0 else 4)
+            for entry_type, entry_start, _ in _iter_boxes(meta, start, end):
+                version = meta[entry_start]
+                if entry_type != b'infe' or version < 2:
+                    continue
+                id_size = 2 if version == 2 else 4
+                item_id, p = _read_uint(meta, entry_start + 4, id_size)
+                if meta[p + 2:p + 6] == b'Exif':
+                    exif_ids.add(item_id)
+        elif box_type == b'iloc':
+            version = meta[start]
+            offset_size, length_size = meta[start + 4] >> 4, meta[start + 4] & 0xF
+            base_offset_size, index_size = meta[start + 5] >> 4, meta[start + 5] & 0xF
+            if version == 0:
+                index_size = 0
+            p = start + 6
+            item_count, p = _read_uint(meta, p, 2 if version < 2 else 4)
+            for _ in range(item_count):
+                item_id, p = _read_uint(meta, p, 2 if version < 2 else 4)
+                method = 0
+                if version in (1, 2):
+                    method, p = _read_uint(meta, p, 2)
+                    method &= 0xF
+                p += 2  # data_reference_index
+                base_offset, p = _read_uint(meta, p, base_offset_size)
+                extent_count, p = _read_uint(meta, p, 2)
+                extents = []
+                for _ in range(extent_count):
+                    p += index_size
+                    offset, p = _read_uint(meta, p, offset_size)
+                    length, p = _read_uint(meta, p, length_size)
+                    extents.append((base_offset + offset, length))
+                if method == 0:  # Only items stored at file offsets
+                    locations[item_id] = extents
+
+    for item_id in exif_ids:
+        if not locations.get(item_id):
+            continue
+        data = b''
+        for offset, length in locations[item_id]:
+            if length > HEIC_META_MAX_BYTES:
+                return None
+            f.seek(offset)
+            data += f.read(length)
+        # The item starts with the offset of the TIFF header that follows it
+        if len(data) < 4:
+            return None
+        tiff_offset, = struct.unpack_from('>I', data)
+        return data[4 + tiff_offset:]
+    return None
+
+
+def read_exif(image_path):
+    """Reads the EXIF block of an image, without decoding the image data."""
+    if os.path.splitext(image_path)[1].lower() == '.heic':
+        # Read just the Exif item; anything unexpected falls back to pillow-heif below
+        try:
+            with open(image_path, 'rb') as f:
+                tiff = read_heic_exif_bytes(f)
+            if tiff:
+                exif = Image.Exif()
+                exif.load(tiff)
+                return exif
+        except Exception:
+            pass
+
+    with Image.open(image_path) as img:
+        return img.getexif()
+
+
+def get_gps_dms_from_pillow(image_path):
+    """Extracts the raw GPS coordinates in-process with Pillow.
+
+    Returns (lat_dms, lat_ref, lon_dms, lon_ref), or None if the image has no GPS data;
+    raises if Pillow can't read the file. Only the EXIF block is parsed, the image data
+    itself is never decoded. Use convert_to_decimal() on many of these at once.
+    """
+    gps = read_exif(image_path).get_ifd(IFD.GPSInfo)
+
+    lat, lon = gps.get(GPS.GPSLatitude), gps.get(GPS.GPSLongitude)
+    if not lat or not lon or len(lat) != 3 or len(lon) != 3:
         return None
+    return (tuple(map(float, lat)), gps.get(GPS.GPSLatitudeRef, 'N'),
+            tuple(map(float, lon)), gps.get(GPS.GPSLongitudeRef, 'E'))
 
-def convert_to_decimal(degrees, ref):
-    """Converts GPS coordinates from DMS to decimal degrees."""
-    decimal = 0.0
-    for i, d in enumerate(degrees):
-        decimal += float(d) / (60 ** i)
 
-    if ref in ['S', 'W']:
-        decimal = -decimal
+def convert_to_decimal(degrees, refs):
+    """Converts GPS coordinates from DMS to decimal degrees, for many coordinates at once.
 
+    *degrees* is a sequence of (degrees, minutes, seconds) and *refs* the matching
+    'N'/'S'/'E'/'W'; returns a NumPy array.
+    """
+    dms = np.asarray(degrees, dtype=np.float64).reshape(-1, 3)
+    decimal = dms @ np.array([1.0, 1 / 60, 1 / 3600])
+    decimal[np.isin(np.asarray(refs, dtype=object), ['S', 'W'])] *= -1
     return decimal
 
 
 # Geocode function with caching and rounding coordinates
-def geocode(lat, lon, cache):
-    """Reverse geocodes the given latitude and longitude, suburb, district, town, city (in that order)."""
+def geocode(lat, lon, key, cache, reverse):
+    """Reverse geocodes the given latitude and longitude, suburb, district, town, city (in that order).
+
+    *key* is the point's cache key from GeocodeCache.keys().
+    """
     # Check if this location is in the cache using rounded coordinates
-    location = cache.get_cached_location(lat, lon)
+    location = cache.get_cached_location(key)
 
     if location:
         print(f"Using cached location: {location}")
         return location
     try:
-        # Initialize Nominatim geolocator
-        geolocator = Nominatim(user_agent="YourAppName/1.0 (your@email.com)")
-
         # Geocode the coordinates (lat, lon)
-        location = geolocator.reverse((lat, lon), language='en', exactly_one=True)
+        location = reverse((lat, lon), language='en', exactly_one=True)
 
         # Check if location is found and return the city
         if location:
             address = location.raw.get("address", {})
             location = address.get("suburb", address.get("district", address.get("town", address.get("city", ""))))
             if location:
-                cache.cache_location(lat, lon, location)
+                cache.cache_location(key, location)
                 return location
             else:
                 print(f"\tNo city/suburb/town found for coordinates: {lat}, {lon}")
@@ -127,70 +307,294 @@ def geocode(lat, lon, cache):
         return None
 
 
-def rename_image(image_path, city_name):
-    """Renames image file to append city name."""
-    if not city_name:
-        return
+def reverse_geocode_offline(points):
+    """Looks up the nearest GeoNames place for all points at once, without network access.
 
-    dir_name, file_name = os.path.split(image_path)
-    base_name, ext = os.path.splitext(file_name)
+    *points* is a dict of key -> (lat, lon); returns a dict of key -> place name.
+    """
+    if not points:
+        return {}
+    results = reverse_geocoder.search(list(points.values()))
+    return {key: result.get('name') for key, result in zip(points, results)}
 
-    new_name = f"{base_name}-{city_name.replace(' ', '')}{ext}"
-    new_path = os.path.join(dir_name, new_name)
 
-    # os.rename(image_path, new_path)
-    print(f"\tRenamed {image_path} -> {new_path}")
+def is_geocoded(image_path):
+    """True if an earlier run already renamed (and marked) this image."""
+    try:
+        if GEOCODED_XATTR in os.listxattr(image_path):
+            return True
+    except (AttributeError, OSError):
+        pass
+    return os.path.exists(image_path + SIDECAR_SUFFIX)
 
 
-def process_images(folder_path):
-    """Processes all images in the given folder."""
-    # Initialize cache with 4 decimal places precision
-    cache = GeocodeCache(tolerance=0.025, decimals=4)
+def mark_geocoded(image_path, city_name):
+    """Marks the image as renamed, recording the place name."""
+    try:
+        os.setxattr(image_path, GEOCODED_XATTR, city_name.encode())
+    except (AttributeError, OSError):
+        with open(image_path + SIDECAR_SUFFIX, 'w') as f:
+            f.write(city_name)
 
-    for root, dirs, files in os.walk(folder_path):
-        for file in files:
-            if file.lower().endswith(('jpg', 'jpeg', 'heic')):
-                image_path = os.path.join(root, file)
 
-                # Test if image file has already been renamed...
-                if '-' in file:
-                    print(f"Skipping {image_path} as it has already been renamed.")
+def rename_no_replace(src, dst, dir_fd=None):
+    """Renames *src* to *dst* unless *dst* already exists; returns False if it does.
+
+    Hard-linking the new name and then unlinking the old one fails atomically when the
+    target exists (os.rename would silently replace it). Filesystems without hard links
+    (e.g. FAT/exFAT memory cards) fall back to an existence check before the rename.
+    """
+    try:
+        os.link(src, dst, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+    except FileExistsError:
+        return False
+    except OSError:
+        try:
+            os.stat(dst, dir_fd=dir_fd, follow_symlinks=False)
+            return False
+        except FileNotFoundError:
+            os.rename(src, dst, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+            return True
+    os.unlink(src, dir_fd=dir_fd)
+    return True
+
+
+# Characters that can't go in a file name on common filesystems (path separators, NUL and
+# other control characters, and the ones Windows/exFAT reject)
+UNSAFE_NAME_CHARS = re.compile(r'[\x00-\x1f/\\:*?"<>|]')
+
+
+def safe_place_name(city_name):
+    """Turns a place name into a file name suffix, e.g. "Biel/Bienne" -> "Biel_Bienne"."""
+    return UNSAFE_NAME_CHARS.sub('_', city_name.replace(' ', ''))
+
+
+def rename_images(renames, apply=False):
+    """Renames image files to append their city name (only prints the new names unless *apply* is set).
+
+    *renames* is a list of (image_path, city_name). The files are grouped by directory and
+    renamed relative to one open directory descriptor, so each parent path is resolved once.
+    """
+    by_dir = {}
+    for image_path, city_name in renames:
+        dir_name, file_name = os.path.split(image_path)
+        by_dir.setdefault(dir_name, []).append((file_name, city_name))
+
+    use_dir_fd = apply and os.rename in os.supports_dir_fd
+    for dir_name, files in by_dir.items():
+        try:
+            dir_fd = os.open(dir_name or '.', os.O_RDONLY) if use_dir_fd else None
+        except OSError as e:
+            print(f"\tSkipping renames in {dir_name}: {e}")
+            continue
+        try:
+            for file_name, city_name in files:
+                base_name, ext = os.path.splitext(file_name)
+                new_name = f"{base_name}-{safe_place_name(city_name)}{ext}"
+                image_path = os.path.join(dir_name, file_name)
+                new_path = os.path.join(dir_name, new_name)
+
+                if not apply:
+                    if os.path.lexists(new_path):
+                        print(f"\tWould skip {image_path}: {new_path} already exists")
+                    else:
+                        print(f"\tWould rename {image_path} -> {new_path}")
                     continue
 
-                print(f"Processing {image_path}...")
-
-                # Extract latitude and longitude from EXIF
-                lat_lon = get_lat_lon_from_exif(image_path)
-                if lat_lon:
-                    lat, lon = lat_lon
-                    # print(f"Found coordinates: {lat}, {lon}")
-
-                    # Get city name from coordinates
-                    # city_name = get_city_from_lat_lon(lat, lon)
-                    city_name = geocode(lat, lon, cache)
-                    if city_name:
-                        # Rename the file
-                        print(f"{image_path}: {city_name}....")
-                        rename_image(image_path, city_name)
+                # One file failing must not stop the run halfway through the renames
+                try:
+                    if dir_fd is not None:
+                        renamed = rename_no_replace(file_name, new_name, dir_fd)
                     else:
-                        print(f"City name not found for {image_path}")
-                else:
-                    print(f"No EXIF data for coordinates in {image_path}")
+                        renamed = rename_no_replace(image_path, new_path)
+                except OSError as e:
+                    print(f"\tCould not rename {image_path}: {e}")
+                    continue
+                if not renamed:
+                    print(f"\tSkipped {image_path}: {new_path} already exists")
+                    continue
+                print(f"\tRenamed {image_path} -> {new_path}")
+                try:
+                    mark_geocoded(new_path, city_name)
+                except OSError as e:
+                    print(f"\tCould not mark {new_path} as renamed (a later run may rename it again): {e}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+
+def iter_images(folder_path):
+    """Yields the paths of all images under the folder, recursively."""
+    # scandir hands back the entry type with each name, so no stat() per file
+    try:
+        entries = os.scandir(folder_path)
+    except OSError as e:
+        # Like os.walk, skip folders we can't read (e.g. .Trashes on a macOS volume)
+        print(f"Skipping {folder_path}: {e}")
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_images(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                yield entry.path
+
+
+def process_images(folder_path, offline=False, apply=False):
+    """Processes all images in the given folder.
+
+    With offline=True, places come from the local GeoNames dataset and Nominatim is only
+    asked about points it has no name for. Files are only renamed with apply=True.
+    """
+    # Collect the images first so their EXIF can be read in parallel
+    image_paths = []
+    for image_path in iter_images(folder_path):
+        # Test if image file has already been renamed...
+        if is_geocoded(image_path):
+            print(f"Skipping {image_path} as it has already been renamed.")
+            continue
+
+        image_paths.append(image_path)
+
+    # One geolocator for the whole run, so its HTTP connection is reused between lookups.
+    # Nominatim often takes longer than geopy's 1s default timeout to answer.
+    geolocator = Nominatim(user_agent="YourAppName/1.0 (your@email.com)", timeout=15)
+    # Nominatim's usage policy allows at most 1 request per second; retry briefly on errors
+    reverse = RateLimiter(geolocator.reverse, min_delay_seconds=1.0, max_retries=2,
+                          error_wait_seconds=5, swallow_exceptions=False)
+
+    # Extract latitude and longitude from EXIF, in-process with Pillow (and pillow-heif).
+    # This is mostly waiting on disk reads, so do it on a thread pool.
+    def read_gps(image_path):
+        try:
+            return get_gps_dms_from_pillow(image_path)
+        except Exception as e:
+            print(f"Error extracting EXIF from {image_path}: {e}")
+            return None
+
+    # Initialize cache with 4 decimal places precision
+    with GeocodeCache(tolerance=0.025, decimals=4) as cache:
+        keys = {}
+        names = {}
+
+        # Look each distinct rounded location up once, however many photos were taken there.
+        # Nominatim lookups run on their own thread while EXIF is still being read: new
+        # locations are handed over through a queue as soon as they are seen.
+        unique_points = {}
+        pending = queue.Queue(maxsize=KEY_BATCH_SIZE)
+        stop = threading.Event()
+
+        def geocode_pending():
+            while (item := pending.get()) is not None:
+                if stop.is_set():
+                    continue  # Aborting: drain up to the sentinel without geocoding
+                key, (lat, lon) = item
+                # Never let one failure (e.g. a locked cache database) end the thread,
+                # or the main thread would block forever on a full queue
+                try:
+                    names[key] = geocode(lat, lon, key, cache, reverse)
+                except Exception as e:
+                    print(f"Error in geocoding {lat}, {lon}: {e}")
+
+        def add_points(batch):
+            # Key a batch of (image_path, (lat, lon)) at once and queue the new locations
+            for (image_path, lat_lon), key in zip(batch, cache.keys([p for _, p in batch])):
+                keys[image_path] = key
+                if key not in unique_points:
+                    unique_points[key] = lat_lon
+                    if not offline:
+                        pending.put((key, lat_lon))
+
+        def add_dms_points(batch):
+            # Convert a batch of (image_path, raw GPS) to decimal degrees at once
+            if not batch:
+                return
+            lats = convert_to_decimal([gps[0] for _, gps in batch], [gps[1] for _, gps in batch])
+            lons = convert_to_decimal([gps[2] for _, gps in batch], [gps[3] for _, gps in batch])
+            add_points([(image_path, (lat, lon))
+                        for (image_path, _), lat, lon in zip(batch, lats.tolist(), lons.tolist())])
+
+        geocoder = threading.Thread(target=geocode_pending, daemon=True)
+        geocoder.start()
+        try:
+            batch = []
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                for image_path, gps in zip(image_paths, pool.map(read_gps, image_paths)):
+                    if gps:
+                        batch.append((image_path, gps))
+                        if len(batch) == KEY_BATCH_SIZE:
+                            add_dms_points(batch)
+                            batch = []
+            add_dms_points(batch)
+
+            # The offline lookup wants all points at once; Nominatim only gets what it can't name
+            if offline:
+                for key, name in reverse_geocode_offline(unique_points).items():
+                    if name:
+                        names[key] = name
+                for key, lat_lon in unique_points.items():
+                    if key not in names:
+                        pending.put((key, lat_lon))
+        except BaseException:
+            # On Ctrl-C or an error, drop what is still queued instead of geocoding it first
+            stop.set()
+            while True:
+                try:
+                    pending.get_nowait()
+                except queue.Empty:
+                    break
+            raise
+        finally:
+            pending.put(None)
+            geocoder.join()
+
+    renames = []
+    for image_path in image_paths:
+        print(f"Processing {image_path}...")
+
+        key = keys.get(image_path)
+        if key is not None:
+            # Get city name from coordinates
+            city_name = names.get(key)
+            if city_name:
+                # Rename the file
+                print(f"{image_path}: {city_name}....")
+                renames.append((image_path, city_name))
+            else:
+                print(f"City name not found for {image_path}")
+        else:
+            print(f"No EXIF data for coordinates in {image_path}")
+
+    rename_images(renames, apply)
 
 
 def main():
     """Main function to run the script."""
-    if len(sys.argv) != 2:
-        print("Usage: python rename_images.py <folder_path>")
+    parser = argparse.ArgumentParser(
+        description="Rename photos with the place name from their EXIF GPS coordinates")
+    parser.add_argument("folder_path", help="Folder with the images (searched recursively)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Look places up in the local GeoNames dataset (needs reverse_geocoder) "
+                             "instead of Nominatim; city-level names, much faster")
+    parser.add_argument("--apply", action="store_true",
+                        help="Rename the files (default: only print the new names)")
+    args = parser.parse_args()
+
+    folder_path = args.folder_path
+    if args.offline and reverse_geocoder is None:
+        print('--offline needs the reverse_geocoder package (uv pip install -e ".[offline]")')
         sys.exit(1)
 
-    folder_path = sys.argv[1]
-
     if not os.path.isdir(folder_path):
         print(f"The path '{folder_path}' is not a valid directory.")
         sys.exit(1)
 
-    process_images(folder_path)
+    # Must come before the geolocator (and its requests session) is created
+    if requests_cache is not None:
+        requests_cache.install_cache(HTTP_CACHE_PATH, backend='sqlite',
+                                     expire_after=HTTP_CACHE_EXPIRE_SECONDS)
+
+    process_images(folder_path, offline=args.offline, apply=args.apply)
 
 
 if __name__ == "__main__":